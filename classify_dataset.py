@@ -0,0 +1,163 @@
+"""
+分类数据集：test.py 与 train_classify.py 共用的 CustomDataset 及 GPU 解码辅助函数
+"""
+import os
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from torchvision.io import ImageReadMode, decode_jpeg, read_file
+from PIL import Image
+
+INDEX_CACHE_SUFFIX = '_index.npz'
+# 预处理后的图片缓存：<root_dir>_images.npy 保存 (N, 3, 224, 224) 的 uint8 数组，
+# <root_dir>_images.key 记录生成时的索引键，写入完成后才创建
+MEMMAP_IMAGES_SUFFIX = '_images.npy'
+MEMMAP_KEY_SUFFIX = '_images.key'
+MEMMAP_IMAGE_SIZE = 224
+
+
+class CustomDataset(Dataset):
+    def __init__(self, root_dir, transform=None, use_cache=True,
+                 raw_bytes=False, memmap=False):
+        self.root_dir = root_dir
+        self.transform = transform
+        # raw_bytes=True 时只读取未解码的文件字节，解码和变换交给 GPU（见 decode_batch_on_gpu）
+        self.raw_bytes = raw_bytes
+        self.classes = os.listdir(root_dir)
+        self.class_to_idx = {cls_name: i for i,
+                             cls_name in enumerate(self.classes)}
+
+        # 索引缓存保存在 <root_dir>_index.npz，以根目录绝对路径及各类别目录的修改时间为键
+        # （增删文件会更新所在目录的 mtime），命中时无需再遍历所有类别目录
+        cache_path = os.path.normpath(root_dir) + INDEX_CACHE_SUFFIX
+        cache_key = self._index_key()
+        index = self._load_index(cache_path, cache_key) if use_cache else None
+        if index is not None:
+            self.image_paths, self.labels = index
+        else:
+            image_paths = []
+            labels = []
+            # 缓存以根目录绝对路径为键，路径也以绝对路径保存，换工作目录后缓存仍然有效
+            abs_root = os.path.abspath(root_dir)
+            for cls_name in self.classes:
+                cls_dir = os.path.join(abs_root, cls_name)
+                # 单次 scandir 遍历，DirEntry.path 已拼接好完整路径
+                with os.scandir(cls_dir) as it:
+                    cls_paths = [entry.path for entry in it]
+                image_paths.extend(cls_paths)
+                labels.extend([self.class_to_idx[cls_name]] * len(cls_paths))
+            # 用紧凑的 NumPy 数组代替 Python 列表，减少多进程 DataLoader 中的引用计数写时复制
+            self.image_paths = np.array(image_paths, dtype=str)
+            self.labels = np.asarray(labels, dtype=np.int32)
+            if use_cache:
+                self._save_index(cache_path, cache_key)
+
+        # memmap=True 时所有图片预先缩放为 224x224 存入一个内存映射文件，
+        # __getitem__ 直接切片读取，不再逐个打开、解码 JPEG；transform 需作用于 uint8 CHW 张量
+        self.memmap_path = None
+        self._images = None
+        if memmap:
+            self.memmap_path = self._prepare_memmap(cache_key)
+
+    def _index_key(self):
+        root = os.path.abspath(self.root_dir)
+        parts = [root]
+        for cls_name in self.classes:
+            mtime = os.stat(os.path.join(root, cls_name)).st_mtime_ns
+            parts.append(f"{cls_name}\t{mtime}")
+        return "\n".join(parts)
+
+    @staticmethod
+    def _load_index(cache_path, cache_key):
+        try:
+            with np.load(cache_path) as data:
+                if str(data['key']) != cache_key:
+                    return None
+                return data['image_paths'], data['labels']
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save_index(self, cache_path, cache_key):
+        try:
+            np.savez(cache_path, key=np.array(cache_key),
+                     image_paths=self.image_paths, labels=self.labels)
+        except OSError as e:
+            print(f"警告：无法写入数据集索引缓存 {cache_path}: {e}")
+
+    def _prepare_memmap(self, cache_key):
+        base = os.path.normpath(self.root_dir)
+        images_path = base + MEMMAP_IMAGES_SUFFIX
+        key_path = base + MEMMAP_KEY_SUFFIX
+        try:
+            with open(key_path, encoding='utf-8') as f:
+                if f.read() == cache_key and os.path.isfile(images_path):
+                    return images_path
+        except OSError:
+            pass
+
+        # 先删除旧的键文件，生成中断时不会留下看似有效的缓存
+        if os.path.exists(key_path):
+            os.remove(key_path)
+        size = MEMMAP_IMAGE_SIZE
+        print(f"生成图片缓存 {images_path} ({len(self.image_paths)} 张)...")
+        images = np.lib.format.open_memmap(
+            images_path, mode='w+', dtype=np.uint8,
+            shape=(len(self.image_paths), 3, size, size))
+        for i, img_path in enumerate(self.image_paths):
+            # 与 transforms.Resize 作用于 PIL 图片时相同的双线性缩放
+            image = Image.open(img_path).convert('RGB').resize(
+                (size, size), Image.BILINEAR)
+            images[i] = np.asarray(image).transpose(2, 0, 1)
+        images.flush()
+        del images
+        with open(key_path, 'w', encoding='utf-8') as f:
+            f.write(cache_key)
+        return images_path
+
+    def __getstate__(self):
+        # 内存映射不随数据集对象传给 DataLoader 工作进程（否则会被整体序列化），由各进程自行打开
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+    def __len__(self):
+        return len(self.image_paths)
+
+    def __getitem__(self, idx):
+        img_path = self.image_paths[idx]
+        label = int(self.labels[idx])
+        if self.memmap_path is not None:
+            if self._images is None:
+                self._images = np.load(self.memmap_path, mmap_mode='r')
+            # 复制出可写的独立数组，避免变换作用于只读映射
+            image = torch.from_numpy(np.array(self._images[idx]))
+            if self.transform:
+                image = self.transform(image)
+            return image, label
+        if self.raw_bytes:
+            return read_file(str(img_path)), label
+        image = Image.open(img_path).convert('RGB')
+        if self.transform:
+            image = self.transform(image)
+        return image, label
+
+
+def collate_raw_bytes(batch):
+    """raw_bytes 模式下的 collate_fn：各图片字节长度不同，保持为列表"""
+    data, labels = zip(*batch)
+    return list(data), torch.tensor(labels)
+
+
+def decode_batch_on_gpu(data, device, transform=None, normalize=None):
+    """
+    用 nvJPEG 在 GPU 上批量解码 JPEG 字节（需要 torchvision>=0.19），
+    逐张做 uint8 空间变换后拼成批次，再转为 [0, 1] 浮点（等价于 ToTensor）
+    """
+    images = decode_jpeg(data, mode=ImageReadMode.RGB, device=device)
+    if transform is not None:
+        images = [transform(img) for img in images]
+    images = torch.stack(images).float().div_(255)
+    images = images.contiguous(memory_format=torch.channels_last)
+    if normalize is not None:
+        images = normalize(images)
+    return images
@@ -23,6 +23,8 @@ import shutil
 import random
 from typing import List, Tuple
 
+from file_copy import link_or_copy
+
 
 def find_image_label_pairs(yolo_root: str) -> List[Tuple[str, str, str]]:
     """
@@ -72,7 +74,8 @@ def find_image_label_pairs(yolo_root: str) -> List[Tuple[str, str, str]]:
 def copy_yolo_pairs(pairs: List[Tuple[str, str, str]],
                     source_root: str,
                     target_root: str,
-                    copy_only_labeled: bool = False) -> dict:
+                    copy_only_labeled: bool = False,
+                    hardlink: bool = False) -> dict:
     """
     复制图片-标注对到目标目录
     
@@ -81,10 +84,14 @@ def copy_yolo_pairs(pairs: List[Tuple[str, str, str]],
         source_root: 源YOLO根目录
         target_root: 目标YOLO根目录
         copy_only_labeled: 是否只复制有标注的图片
+        hardlink: 是否使用硬链接代替复制（同一文件系统下不占用额外空间，
+                  修改目标文件会同时影响源文件）
         
     Returns:
         复制统计信息
     """
+    copy_func = link_or_copy if hardlink else shutil.copy2
+
     images_src_dir = os.path.join(source_root, 'images')
     labels_src_dir = os.path.join(source_root, 'labels')
     images_dst_dir = os.path.join(target_root, 'images')
@@ -109,7 +116,7 @@ def copy_yolo_pairs(pairs: List[Tuple[str, str, str]],
         os.makedirs(os.path.dirname(image_dst_path), exist_ok=True)
         
         # 复制图片
-        shutil.copy2(image_path, image_dst_path)
+        copy_func(image_path, image_dst_path)
         stats['images_copied'] += 1
         
         # 复制标注（如果存在）
@@ -117,7 +124,7 @@ def copy_yolo_pairs(pairs: List[Tuple[str, str, str]],
             label_rel_path = os.path.relpath(label_path, labels_src_dir)
             label_dst_path = os.path.join(labels_dst_dir, label_rel_path)
             os.makedirs(os.path.dirname(label_dst_path), exist_ok=True)
-            shutil.copy2(label_path, label_dst_path)
+            copy_func(label_path, label_dst_path)
             stats['labels_copied'] += 1
         else:
             stats['images_without_labels'] += 1
@@ -163,6 +170,8 @@ def main():
                         help='只复制有标注的图片')
     parser.add_argument('--seed', type=int, default=42,
                         help='随机种子，用于可重复的随机采样 (默认: 42)')
+    parser.add_argument('--hardlink', action='store_true',
+                        help='使用硬链接代替复制（同一文件系统下零拷贝，跨文件系统自动回退为复制）')
     
     args = parser.parse_args()
     
@@ -197,6 +206,7 @@ def main():
         print(f"复制数量: {args.count}")
     print(f"随机采样: {'否' if args.no_shuffle else '是'}")
     print(f"只复制有标注: {'是' if args.only_labeled else '否'}")
+    print(f"使用硬链接: {'是' if args.hardlink else '否'}")
     if not args.no_shuffle:
         print(f"随机种子: {args.seed}")
     print("=" * 80)
@@ -245,7 +255,8 @@ def main():
     
     # 复制文件
     print("\n开始复制文件...")
-    stats = copy_yolo_pairs(selected_pairs, args.source_dir, args.target_dir, args.only_labeled)
+    stats = copy_yolo_pairs(selected_pairs, args.source_dir, args.target_dir,
+                            args.only_labeled, hardlink=args.hardlink)
     
     # 显示统计信息
     print("\n" + "=" * 80)
@@ -0,0 +1,86 @@
+"""
+文件复制工具：各数据处理脚本共用的快速复制 / 硬链接函数
+
+所有函数在写入前都会先删除已存在的目标文件：目标可能是之前生成的、与源文件
+同一 inode 的硬链接，直接以 'wb' 打开会截断源文件。目标与源文件是同一路径时
+（例如输出目录就是输入目录）不做任何操作。
+"""
+
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl
+    fcntl = None
+
+
+# Linux FICLONE ioctl（_IOW(0x94, 9, int)），在 btrfs/XFS 等文件系统上以写时复制方式克隆整个文件
+FICLONE = 0x40049409
+
+
+def _prepare_dst(src, dst):
+    """
+    删除已存在的目标文件，返回是否需要继续写入。
+    目标与源文件是同一路径时返回 False，避免删除源文件；
+    指向源文件的硬链接不算同一路径，会被删除后重新写入。
+    """
+    if not os.path.lexists(dst):
+        return True
+    if os.path.realpath(src) == os.path.realpath(dst):
+        return False
+    os.remove(dst)
+    return True
+
+
+def clone_file(src, dst, reflink=True):
+    """
+    复制单个文件（含元数据），依次尝试：
+    1. FICLONE reflink：只复制元数据，不移动数据（reflink=False 时跳过）
+    2. os.copy_file_range：在内核中完成数据拷贝
+    3. shutil.copyfile：普通复制
+    """
+    if not _prepare_dst(src, dst):
+        return dst
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        done = False
+        if reflink and fcntl is not None:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                done = True
+            except OSError:
+                pass
+        if not done and hasattr(os, "copy_file_range"):
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                done = remaining == 0
+            except OSError:
+                pass
+    if not done:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+
+def copy_file(src, dst):
+    """普通复制（不使用 reflink），数据拷贝优先在内核中完成"""
+    return clone_file(src, dst, reflink=False)
+
+
+def link_or_copy(src, dst):
+    """
+    优先创建硬链接（同一文件系统下零数据拷贝），失败时（跨文件系统、
+    不支持硬链接等）回退为 clone_file 复制
+    """
+    if not _prepare_dst(src, dst):
+        return dst
+    try:
+        os.link(src, dst)
+    except OSError:
+        clone_file(src, dst)
+    return dst
@@ -39,6 +39,7 @@ dataset/
 """
 
 import argparse
+import os
 from pathlib import Path
 from typing import List, Tuple
 
@@ -227,13 +228,20 @@ def process_yolo_dataset(
     # Supported image extensions
     supported_exts = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
 
-    # Find all images
-    image_files = []
-    for ext in supported_exts:
-        image_files.extend(images_dir.glob(f"*{ext}"))
-        image_files.extend(images_dir.glob(f"*{ext.upper()}"))
+    # Find all images in a single directory pass instead of globbing once per
+    # extension and case (extension match stays case-sensitive: .jpg / .JPG)
+    matched_exts = supported_exts | {ext.upper() for ext in supported_exts}
+    with os.scandir(images_dir) as it:
+        image_files = sorted(
+            images_dir / entry.name
+            for entry in it
+            if os.path.splitext(entry.name)[1] in matched_exts
+        )
 
-    image_files = sorted(set(image_files))  # Remove duplicates and sort
+    # Read the label directory once and look labels up by name instead of
+    # stat-ing one label path per image
+    with os.scandir(labels_dir) as it:
+        label_names = {entry.name for entry in it}
 
     total_images = len(image_files)
     deleted_images = 0
@@ -252,7 +260,7 @@ def process_yolo_dataset(
         label_name = image_path.stem + ".txt"
         label_path = labels_dir / label_name
 
-        if not label_path.exists():
+        if label_name not in label_names:
             print(f"Warning: No label file for {image_path.name}")
             continue
 
@@ -3,22 +3,41 @@
 '''
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 
-def convert_labelme_to_yolo(root_dir):
+def _run_labelme2yolo(subdir, subdir_path):
+    """
+    对单个子文件夹执行 labelme2yolo 命令，返回 (子文件夹名, 命令输出, 错误信息或None)。
+    """
+    # 以参数列表方式调用，不经过 shell 解析（路径含空格/特殊字符时也安全）；
+    # 多个目录并行转换，输出先捕获下来，由主线程按目录整块打印，避免互相穿插
+    cmd = ["labelme2yolo", "--json_dir", subdir_path]
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        return subdir, result.stdout, None
+    except subprocess.CalledProcessError as e:
+        return subdir, e.stdout or "", f"{e}\n{e.stderr or ''}".rstrip()
+    except FileNotFoundError:
+        return subdir, "", "未找到 labelme2yolo 命令，请先安装"
+
+
+def convert_labelme_to_yolo(root_dir, max_workers=None):
     """
     遍历根目录下的所有子文件夹，对每个子文件夹执行 labelme2yolo 转换。
 
     参数:
         root_dir (str): 根目录路径（包含子文件夹的路径）。
+        max_workers (int, optional): 同时运行的转换进程数，默认为CPU核数。
     """
     # 检查根目录是否存在
     if not os.path.isdir(root_dir):
         print(f"错误：目录 '{root_dir}' 不存在！")
         return
 
-    # 遍历根目录下的所有子文件夹
-    for subdir in os.listdir(root_dir):
+    # 遍历根目录下的所有子文件夹，收集需要转换的目录
+    tasks = []
+    for subdir in sorted(os.listdir(root_dir)):
         subdir_path = os.path.join(root_dir, subdir)
 
         # 确保是目录（跳过文件）
@@ -32,16 +51,18 @@ def convert_labelme_to_yolo(root_dir):
             print(f"跳过目录 '{subdir}'（未找到 JSON 文件）")
             continue
 
-        # 构造 labelme2yolo 命令
-        cmd = f"labelme2yolo --json_dir {subdir_path}"
-        print(f"正在处理: {cmd}")
+        print(f"正在处理: labelme2yolo --json_dir {subdir_path}")
+        tasks.append((subdir, subdir_path))
 
-        # 执行命令
-        try:
-            subprocess.run(cmd, shell=True, check=True)
-            print(f"转换完成: {subdir}")
-        except subprocess.CalledProcessError as e:
-            print(f"转换失败（目录: {subdir}）: {e}")
+    # 各目录的转换互不依赖，并行启动多个子进程
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as ex:
+        for subdir, output, error in ex.map(lambda t: _run_labelme2yolo(*t), tasks):
+            if output:
+                print(output, end="" if output.endswith("\n") else "\n")
+            if error is None:
+                print(f"转换完成: {subdir}")
+            else:
+                print(f"转换失败（目录: {subdir}）: {error}")
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ import random
 import argparse
 from typing import List
 
+from file_copy import copy_file
+
 
 def list_subdirectories(root: str, include_hidden: bool = False) -> List[str]:
     """列出根目录下的一级子文件夹名称（不含路径）。
@@ -12,19 +14,27 @@ def list_subdirectories(root: str, include_hidden: bool = False) -> List[str]:
         root: 根目录路径
         include_hidden: 是否包含以点开头的隐藏目录
     """
-    items = []
     try:
-        for name in os.listdir(root):
-            if not include_hidden and name.startswith('.'):
-                continue
-            full_path = os.path.join(root, name)
-            if os.path.isdir(full_path):
-                items.append(name)
+        # scandir 的 DirEntry.is_dir() 直接使用目录项中的类型信息，无需逐个 stat
+        with os.scandir(root) as it:
+            items = [
+                entry.name for entry in it
+                if entry.is_dir()
+                and (include_hidden or not entry.name.startswith('.'))
+            ]
     except FileNotFoundError:
         raise FileNotFoundError(f"输入目录不存在: {root}")
     return sorted(items)
 
 
+def move_directory(src: str, dst: str) -> None:
+    """移动目录：同一文件系统下直接 rename，跨文件系统时由 shutil.move 复制后删除源目录。
+
+    shutil.move 会保留"不能把目录移动到自身内部"等检查，复制时使用 copy_file 加速。
+    """
+    shutil.move(src, dst, copy_function=copy_file)
+
+
 def valid_ratio(value: str) -> float:
     """校验比例 (0,1)"""
     try:
@@ -66,7 +76,12 @@ def move_subfolders(source: str, dest: str, ratio: float, seed: int = 42,
     if k > total:
         k = total
 
-    selected = random.sample(subdirs, k)
+    # 选取超过一半时，原地打乱后切片比 random.sample 少一次列表拷贝
+    if k > total // 2:
+        random.shuffle(subdirs)
+        selected = subdirs[:k]
+    else:
+        selected = random.sample(subdirs, k)
 
     print(f"源目录: {source}")
     print(f"目标目录: {dest}")
@@ -101,7 +116,7 @@ def move_subfolders(source: str, dest: str, ratio: float, seed: int = 42,
                 continue
 
         try:
-            shutil.move(src_path, dst_path)
+            move_directory(src_path, dst_path)
             moved += 1
             print(f"[OK] {name} -> {target_name}")
         except Exception as e:
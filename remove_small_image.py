@@ -1,6 +1,9 @@
 import os
 from PIL import Image
 
+# 支持的图片格式（小写、含点）
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp'})
+
 
 def delete_small_images(root_dir, min_resolution):
     """
@@ -8,14 +11,11 @@ def delete_small_images(root_dir, min_resolution):
     :param root_dir: 根目录路径（包含多个分类子文件夹）
     :param min_resolution: 最小分辨率（长或宽）
     """
-    # 支持的图片格式
-    image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
-
     # 遍历根目录下的所有子文件夹和文件
     for subdir, _, files in os.walk(root_dir):
         for file in files:
-            # 检查是否为图片文件
-            if file.lower().endswith(image_extensions):
+            # 检查是否为图片文件（只对扩展名做小写转换）
+            if os.path.splitext(file)[1].lower() in IMAGE_EXTENSIONS:
                 file_path = os.path.join(subdir, file)
                 try:
                     # 打开图片并获取尺寸
@@ -1,5 +1,9 @@
 import os
 import re
+import sys
+
+# 提取文件名末尾数字序号的正则（预编译，大小写不敏感以兼容 .JPG）
+NUMBER_PATTERN = re.compile(r'(\d+)\.jpg$', re.IGNORECASE)
 
 def rename_files(folder_path, prefix="img_", new_format="{:05d}.jpg"):
     """
@@ -14,20 +18,28 @@ def rename_files(folder_path, prefix="img_", new_format="{:05d}.jpg"):
     files = [f for f in os.listdir(folder_path) if f.lower().endswith('.jpg')]
     
     # 按数字顺序排序文件
-    files.sort(key=lambda x: int(re.search(r'(\d+)\.jpg$', x).group(1)))
+    files.sort(key=lambda x: int(NUMBER_PATTERN.search(x).group(1)))
     
-    # 重命名每个文件
-    for i, old_name in enumerate(files, start=1):
-        # 构造新文件名 (如 img_00001.jpg)
-        new_name = f"{prefix}{new_format.format(i)}"
-        
-        # 完整的旧路径和新路径
-        old_path = os.path.join(folder_path, old_name)
-        new_path = os.path.join(folder_path, new_name)
-        
-        # 重命名文件
-        os.rename(old_path, new_path)
-        print(f"Renamed: {old_name} -> {new_name}")
+    new_names = [f"{prefix}{new_format.format(i)}" for i in range(1, len(files) + 1)]
+
+    # 若新文件名与尚未重命名的旧文件名冲突，先统一改为临时名再改为最终名（两阶段重命名）
+    if set(new_names) & set(files):
+        tmp_names = [f".tmp_rename_{i}" for i in range(len(files))]
+        for old_name, tmp_name in zip(files, tmp_names):
+            os.rename(os.path.join(folder_path, old_name),
+                      os.path.join(folder_path, tmp_name))
+        sources = tmp_names
+    else:
+        sources = files
+
+    # 重命名每个文件，日志最后一次性输出，避免逐行刷新终端
+    log = []
+    for old_name, src_name, new_name in zip(files, sources, new_names):
+        os.rename(os.path.join(folder_path, src_name),
+                  os.path.join(folder_path, new_name))
+        log.append(f"Renamed: {old_name} -> {new_name}")
+    if log:
+        sys.stdout.write("\n".join(log) + "\n")
 
 if __name__ == "__main__":
     # 使用示例
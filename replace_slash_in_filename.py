@@ -1,6 +1,12 @@
 import json
 import os
 
+try:
+    # orjson 为C实现的JSON库，大型COCO文件的解析/序列化快数倍；未安装时回退到标准库
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def replace_slash_in_filename(input_file, output_file=None):
     """
@@ -11,19 +17,29 @@ def replace_slash_in_filename(input_file, output_file=None):
         output_file (str, optional): 输出的JSON文件路径。如果为None，则覆盖原文件
     """
     # 读取输入文件
-    with open(input_file, 'r') as f:
-        coco_data = json.load(f)
+    if orjson is not None:
+        with open(input_file, 'rb') as f:
+            coco_data = orjson.loads(f.read())
+    else:
+        with open(input_file, 'r') as f:
+            coco_data = json.load(f)
 
-    # 修改所有file_name
+    # 修改所有file_name（不含/的文件名无需替换和回写）
     for image in coco_data['images']:
-        image['file_name'] = image['file_name'].replace('/', '_')
+        file_name = image['file_name']
+        if '/' in file_name:
+            image['file_name'] = file_name.replace('/', '_')
 
     # 确定输出路径（如果未指定output_file，则覆盖原文件）
     save_path = output_file if output_file else input_file
 
     # 写入文件
-    with open(save_path, 'w') as f:
-        json.dump(coco_data, f, indent=2)
+    if orjson is not None:
+        with open(save_path, 'wb') as f:
+            f.write(orjson.dumps(coco_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(save_path, 'w') as f:
+            json.dump(coco_data, f, indent=2)
 
     print(f"处理完成，结果已保存到: {save_path}")
 
@@ -1,16 +1,34 @@
 import os
+import mmap
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import cv2
+import numpy as np
 from typing import Tuple, Optional, Collection
 
 
-SUPPORTED_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+SUPPORTED_EXTS = frozenset(
+    {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+)
+
+
+@lru_cache(maxsize=8)
+def _lower_exts(exts: frozenset) -> frozenset:
+    """调用方传入的扩展名集合统一转为小写（同一集合只转换一次）"""
+    return frozenset(map(str.lower, exts))
 
 
 def is_image_file(
     filename: str, exts: Optional[Collection[str]] = None
 ) -> bool:
-    exts_set = set(map(str.lower, exts)) if exts else SUPPORTED_EXTS
+    if not exts:
+        exts_set = SUPPORTED_EXTS
+    elif isinstance(exts, frozenset):
+        # frozenset 可哈希，小写化结果被缓存，重复传入同一集合时无需重建
+        exts_set = _lower_exts(exts)
+    else:
+        exts_set = frozenset(map(str.lower, exts))
     _, ext = os.path.splitext(filename)
     return ext.lower() in exts_set
 
@@ -59,6 +77,21 @@ def resize_with_padding(img, target_w: int, target_h: int):
     return padded
 
 
+def read_image_mmap(img_path: str, flags: int = cv2.IMREAD_UNCHANGED):
+    """通过内存映射读取并解码图片，解码器直接读取映射页，省去一次读缓冲拷贝。
+    读取失败或文件为空时返回 None。
+    """
+    with open(img_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buf = np.frombuffer(mm, dtype=np.uint8)
+            img = cv2.imdecode(buf, flags)
+            # 关闭映射前必须释放对其的引用，否则 mmap.close 会抛出 BufferError
+            del buf
+    return img
+
+
 def process_image_inplace(
     img_path: str, target_w: int, target_h: int
 ) -> Tuple[bool, str]:
@@ -67,7 +100,7 @@ def process_image_inplace(
     """
     try:
         # 尝试保留通道（包括alpha）
-        img = cv2.imread(img_path, cv2.IMREAD_UNCHANGED)
+        img = read_image_mmap(img_path, cv2.IMREAD_UNCHANGED)
         if img is None:
             return False, "读取失败"
 
@@ -100,14 +133,28 @@ def process_image_inplace(
         return False, str(e)
 
 
+def _init_worker():
+    # 每个子进程内限制OpenCV为单线程，避免与进程池叠加造成CPU超额订阅
+    cv2.setNumThreads(1)
+
+
+def _process_image_star(args: Tuple[str, int, int]) -> Tuple[bool, str]:
+    return process_image_inplace(*args)
+
+
 def walk_and_process(
-    root: str, target_w: int, target_h: int, dry_run: bool = False
+    root: str,
+    target_w: int,
+    target_h: int,
+    dry_run: bool = False,
+    workers: Optional[int] = None,
 ):
     total = 0
     changed = 0
     skipped = 0
     failed = 0
 
+    paths = []
     for dirpath, _, filenames in os.walk(root):
         for fname in filenames:
             if not is_image_file(fname):
@@ -117,18 +164,26 @@ def walk_and_process(
             if dry_run:
                 print(f"预览: {path}")
                 continue
-            modified, msg = process_image_inplace(path, target_w, target_h)
-            if modified:
-                changed += 1
-                print(f"[OK] {path}")
-            else:
-                if msg == "已是目标尺寸":
-                    skipped += 1
-                elif msg:
-                    failed += 1
-                    print(f"[失败] {path} - {msg}")
+            paths.append(path)
+
+    if paths:
+        tasks = [(path, target_w, target_h) for path in paths]
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(), initializer=_init_worker
+        ) as ex:
+            results = ex.map(_process_image_star, tasks, chunksize=16)
+            for path, (modified, msg) in zip(paths, results):
+                if modified:
+                    changed += 1
+                    print(f"[OK] {path}")
                 else:
-                    skipped += 1
+                    if msg == "已是目标尺寸":
+                        skipped += 1
+                    elif msg:
+                        failed += 1
+                        print(f"[失败] {path} - {msg}")
+                    else:
+                        skipped += 1
 
     print("\n统计：")
     print(f"  总图片数:   {total}")
@@ -146,6 +201,7 @@ def main():
     parser.add_argument('-W', '--width', type=int, required=True, help='目标宽度')
     parser.add_argument('-H', '--height', type=int, required=True, help='目标高度')
     parser.add_argument('--dry-run', action='store_true', help='仅预览将处理的文件，不写入')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='并行进程数（默认CPU核数）')
 
     args = parser.parse_args()
 
@@ -156,7 +212,13 @@ def main():
         print(f"错误：根目录不存在 {args.root}")
         return
 
-    walk_and_process(args.root, args.width, args.height, dry_run=args.dry_run)
+    walk_and_process(
+        args.root,
+        args.width,
+        args.height,
+        dry_run=args.dry_run,
+        workers=args.workers,
+    )
 
 
 if __name__ == '__main__':
@@ -2,28 +2,29 @@ import os
 import shutil
 import random
 import argparse
-import glob
 from tqdm import tqdm
 
 
+IMAGE_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.bmp',
+    '.tiff', '.tif', '.gif', '.webp'
+})
+
+
 def get_image_files(input_dir):
     """
     获取指定目录下的所有图片文件
     支持的格式: jpg, jpeg, png, bmp, tiff, tif, gif, webp
     """
-    image_extensions = [
-        '*.jpg', '*.jpeg', '*.png', '*.bmp',
-        '*.tiff', '*.tif', '*.gif', '*.webp'
-    ]
-    image_files = []
-
-    for ext in image_extensions:
-        # 不区分大小写的匹配
-        image_files.extend(glob.glob(os.path.join(input_dir, ext)))
-        image_files.extend(glob.glob(os.path.join(input_dir, ext.upper())))
+    # 单次 scandir 遍历，扩展名不区分大小写
+    with os.scandir(input_dir) as it:
+        image_files = [
+            entry.path for entry in it
+            if entry.is_file()
+            and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+        ]
 
-    # 使用set去重，防止因大小写匹配导致重复
-    return sorted(list(set(image_files)))
+    return sorted(image_files)
 
 
 def split_and_move_images(input_dir, output_dir, ratio, seed):
@@ -54,7 +55,12 @@ def split_and_move_images(input_dir, output_dir, ratio, seed):
     print(f"根据比例 {ratio}，计划移动 {num_to_move} 个文件到 {output_dir}")
 
     # 随机选择要移动的文件
-    files_to_move = random.sample(image_files, num_to_move)
+    # 选取超过一半时，原地打乱后切片比 random.sample 少一次列表拷贝
+    if num_to_move > total_files // 2:
+        random.shuffle(image_files)
+        files_to_move = image_files[:num_to_move]
+    else:
+        files_to_move = random.sample(image_files, num_to_move)
 
     # 移动文件
     moved_count = 0
@@ -69,7 +75,7 @@ def split_and_move_images(input_dir, output_dir, ratio, seed):
 
     print(f"\n操作完成! 成功移动 {moved_count} 个文件。")
     print(f"源文件夹 {input_dir} 剩余: {total_files - moved_count} 个文件。")
-    print(f"目标文件夹 {output_dir} 现在有: {len(get_image_files(output_dir))} 个文件。")
+    print(f"目标文件夹 {output_dir} 本次移入: {moved_count} 个文件。")
 
 
 def valid_ratio(value):
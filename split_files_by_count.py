@@ -5,12 +5,56 @@
 子文件夹内的文件结构不会修改。
 """
 
+import os
 import shutil
 import random
 import argparse
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import List, Tuple
 
+from file_copy import clone_file
+
+
+def _raise_walk_error(error):
+    """os.walk 默认静默跳过无法读取的目录，这里与 shutil.copytree 一致直接抛出"""
+    raise error
+
+
+def parallel_copytrees(jobs, executor):
+    """
+    并行复制多个目录树，并行粒度为单个文件而不是整个目录树。
+    
+    1. 串行遍历所有源目录，创建目标目录骨架并收集 (源文件, 目标文件) 对
+    2. 所有文件提交到共享的 executor 中用 clone_file 并行复制
+    3. 文件复制完成后，自底向上恢复目录的元数据（mtime 等）
+    
+    Args:
+        jobs: (源目录, 目标目录) 列表，目标目录必须不存在
+        executor: 共享的线程池
+    """
+    dir_pairs = []
+    file_pairs = []
+    for src, dst in jobs:
+        # 与 shutil.copytree 默认行为一致：跟随符号链接，复制其指向的内容
+        for root, _, filenames in os.walk(src, onerror=_raise_walk_error, followlinks=True):
+            dst_root = os.path.normpath(os.path.join(dst, os.path.relpath(root, src)))
+            os.makedirs(dst_root)
+            dir_pairs.append((root, dst_root))
+            file_pairs.extend(
+                (os.path.join(root, name), os.path.join(dst_root, name))
+                for name in filenames
+            )
+    
+    futures = [executor.submit(clone_file, src, dst) for src, dst in file_pairs]
+    # 等待全部任务结束后再统一抛出第一个异常
+    wait(futures)
+    for future in futures:
+        future.result()
+    
+    for src, dst in reversed(dir_pairs):
+        shutil.copystat(src, dst)
+
 
 def get_all_subfolders(folder_path: str) -> List[str]:
     """
@@ -22,15 +66,9 @@ def get_all_subfolders(folder_path: str) -> List[str]:
     Returns:
         子文件夹列表，每个元素为相对于文件夹的相对路径
     """
-    subfolders = []
-    folder_path_obj = Path(folder_path)
-    
-    # 遍历直接子文件夹
-    for item in folder_path_obj.iterdir():
-        if item.is_dir():
-            # 保存相对路径
-            relative_path = item.relative_to(folder_path_obj)
-            subfolders.append(str(relative_path))
+    # 遍历直接子文件夹，DirEntry.is_dir() 使用目录项自带的类型信息，无需逐个 stat
+    with os.scandir(folder_path) as it:
+        subfolders = [entry.name for entry in it if entry.is_dir()]
     
     return sorted(subfolders)  # 排序以确保一致性
 
@@ -39,7 +77,8 @@ def split_files(
     source_folder: str,
     output_folder: str,
     count: int,
-    random_seed=None
+    random_seed=None,
+    max_workers=None
 ) -> Tuple[List[str], List[str]]:
     """
     随机分割子文件夹为两部分。
@@ -49,6 +88,7 @@ def split_files(
         output_folder: 输出文件夹路径
         count: 第一部分的子文件夹数量
         random_seed: 随机种子（可选）
+        max_workers: 并行复制的线程数（可选，默认 min(32, CPU核数*4)）
         
     Returns:
         元组 (first_part, second_part)，每个都是子文件夹列表
@@ -78,13 +118,12 @@ def split_files(
     if random_seed is not None:
         random.seed(random_seed)
     
-    # 随机打乱子文件夹列表
-    shuffled_subfolders = all_subfolders.copy()
-    random.shuffle(shuffled_subfolders)
+    # 随机抽取第一部分（random.sample 只做 count 次抽取，无需复制并打乱整个列表）
+    first_set = set(random.sample(all_subfolders, count))
     
-    # 分割为两部分
-    first_part = shuffled_subfolders[:count]
-    second_part = shuffled_subfolders[count:]
+    # 分割为两部分，各部分内保持排序后的顺序
+    first_part = [p for p in all_subfolders if p in first_set]
+    second_part = [p for p in all_subfolders if p not in first_set]
     
     # 创建输出文件夹
     output_path.mkdir(parents=True, exist_ok=True)
@@ -95,23 +134,18 @@ def split_files(
     first_folder.mkdir(exist_ok=True)
     second_folder.mkdir(exist_ok=True)
     
-    # 复制子文件夹到第一部分
-    print(f"正在复制第一部分子文件夹 ({len(first_part)} 个)...")
-    for subfolder_rel_path in first_part:
-        src_subfolder = source_path / subfolder_rel_path
-        dst_subfolder = first_folder / subfolder_rel_path
-        
-        # 递归复制整个子文件夹及其内容
-        shutil.copytree(src_subfolder, dst_subfolder)
+    # 复制任务列表：(源子文件夹, 目标子文件夹)
+    jobs = [(source_path / p, first_folder / p) for p in first_part]
+    jobs += [(source_path / p, second_folder / p) for p in second_part]
     
-    # 复制子文件夹到第二部分
-    print(f"正在复制第二部分子文件夹 ({len(second_part)} 个)...")
-    for subfolder_rel_path in second_part:
-        src_subfolder = source_path / subfolder_rel_path
-        dst_subfolder = second_folder / subfolder_rel_path
-        
+    # 文件复制主要耗时在文件系统调用上（会释放GIL），所有子文件夹共用一个线程池逐文件并行复制
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+    print(f"正在复制子文件夹 (第一部分 {len(first_part)} 个, "
+          f"第二部分 {len(second_part)} 个, 线程数 {max_workers})...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
         # 递归复制整个子文件夹及其内容
-        shutil.copytree(src_subfolder, dst_subfolder)
+        parallel_copytrees(jobs, executor)
     
     print("\n文件夹分割完成！")
     print(f"第一部分: {len(first_part)} 个子文件夹 -> {first_folder}")
@@ -150,6 +184,12 @@ def main():
         default=None,
         help="随机种子（可选，不指定则每次随机）"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="并行复制的线程数（可选，默认 min(32, CPU核数*4)）"
+    )
     
     args = parser.parse_args()
     
@@ -163,7 +203,8 @@ def main():
             source_folder=args.source,
             output_folder=args.output,
             count=args.count,
-            random_seed=args.seed
+            random_seed=args.seed,
+            max_workers=args.workers
         )
     except (FileNotFoundError, ValueError) as e:
         print(f"错误: {e}")
@@ -1,24 +1,34 @@
 import os
 import shutil
 import argparse
-import glob
+from tqdm import tqdm
 
 
-def get_image_files(input_dir):
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp',
+                              '.tiff', '.tif', '.gif'})
+
+
+def get_image_files(input_dir, sort=True):
     """
     获取指定目录下的所有图片文件
     支持的格式: jpg, jpeg, png, bmp, tiff, tif, gif
-    """
-    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp',
-                        '*.tiff', '*.tif', '*.gif']
-    image_files = []
 
-    for ext in image_extensions:
-        # 不区分大小写的匹配
-        image_files.extend(glob.glob(os.path.join(input_dir, ext)))
-        image_files.extend(glob.glob(os.path.join(input_dir, ext.upper())))
+    Args:
+        input_dir: 输入目录路径
+        sort: 是否按文件名排序。分割时需要排序，保证连续编号的文件分到同一份且结果可复现；
+              只统计数量时可关闭，返回顺序取决于文件系统
+    """
+    # 单次 scandir 遍历，扩展名不区分大小写
+    with os.scandir(input_dir) as it:
+        image_files = [
+            entry.path for entry in it
+            if entry.is_file()
+            and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+        ]
 
-    return sorted(image_files)
+    if sort:
+        image_files.sort()
+    return image_files
 
 
 def split_images_to_folders(input_dir, num_splits, output_base_dir=None):
@@ -76,16 +86,23 @@ def split_images_to_folders(input_dir, num_splits, output_base_dir=None):
 
         print(f"\n处理第 {i+1} 份 ({len(current_files)} 个文件) -> {output_dir}")
 
-        # 移动文件
-        for file_path in current_files:
-            filename = os.path.basename(file_path)
-            dest_path = os.path.join(output_dir, filename)
+        # 移动文件（目标目录前缀只拼接一次；get_image_files 返回的路径由 scandir 以 os.sep 拼接，
+        # 用 rpartition 即可取出文件名）
+        sep = os.sep
+        out_prefix = output_dir + sep
+        for file_path in tqdm(current_files, desc=f"第 {i+1} 份", unit="file",
+                              mininterval=0.5):
+            filename = file_path.rpartition(sep)[2]
+            dest_path = out_prefix + filename
 
             try:
-                shutil.move(file_path, dest_path)
-                print(f"  移动: {filename}")
+                # 输出目录通常与输入目录在同一文件系统，直接 rename；跨设备时回退到 shutil.move
+                try:
+                    os.replace(file_path, dest_path)
+                except OSError:
+                    shutil.move(file_path, dest_path)
             except Exception as e:
-                print(f"  错误: 移动 {filename} 失败 - {e}")
+                tqdm.write(f"  错误: 移动 {filename} 失败 - {e}")
 
         start_idx = end_idx
 
@@ -127,7 +144,7 @@ def main():
     if args.dry_run:
         print("=== 干运行模式 - 仅显示分割计划 ===")
         # 这里可以添加预览逻辑
-        image_files = get_image_files(args.input)
+        image_files = get_image_files(args.input, sort=False)
         if image_files:
             print(f"将要处理 {len(image_files)} 个图片文件")
             files_per_split = len(image_files) // args.num_splits
@@ -5,11 +5,140 @@
 """
 
 import argparse
+import mmap
+import os
 import shutil
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Optional, Tuple
 
 import cv2
+import numpy as np
+from tqdm import tqdm
+
+from file_copy import link_or_copy
+
+try:
+    from turbojpeg import TJSAMP_420, TurboJPEG
+except ImportError:  # 未安装 PyTurboJPEG 时回退到 cv2.imencode
+    TurboJPEG = None
+
+
+# 子图编码线程池：每个工作进程在初始化时创建一次，供 split_image_and_labels 复用
+_encode_pool: Optional[ThreadPoolExecutor] = None
+# libjpeg-turbo 编码器：每个工作进程在初始化时创建一次，不可用时为 None
+_turbo_jpeg = None
+
+# JPEG 编码质量与色度采样，与 cv2.imencode 的默认值（质量95、4:2:0）保持一致
+JPEG_QUALITY = 95
+JPEG_EXTS = frozenset({".jpg", ".jpeg"})
+
+
+# 超过该大小的图片在读取前提示内核按顺序预读
+FADVISE_THRESHOLD = 16 * 1024 * 1024
+# 提前提示内核异步预读的图片数量
+PREFETCH_WINDOW = 64
+
+
+def prefetch_file(path) -> None:
+    """
+    提示内核异步预读整个文件到页缓存（POSIX_FADV_WILLNEED 不阻塞），
+    让工作进程读取时直接命中缓存，同时让磁盘保持较高的队列深度
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_image_mmap(image_path, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """
+    通过内存映射读取并解码图片，解码器直接读取映射页，省去一次读缓冲拷贝。
+    读取失败或文件为空时返回 None。
+    """
+    with open(image_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return None
+        if size > FADVISE_THRESHOLD and hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buf = np.frombuffer(mm, dtype=np.uint8)
+            img = cv2.imdecode(buf, flags)
+            # 关闭映射前必须释放对其的引用，否则 mmap.close 会抛出 BufferError
+            del buf
+    return img
+
+
+def write_new_file(path, data) -> None:
+    """
+    先删除已存在的目标文件再写入：保留原图时输出目录中的文件是指向源文件的硬链接，
+    直接以 'wb' 打开同名目标会改写源文件
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _encode_and_save(
+    img: np.ndarray,
+    image_ext: str,
+    image_path: Path,
+    export_image_path: Optional[Path] = None,
+) -> None:
+    """
+    将子图编码一次，并把同一份编码结果写入输出目录和（可选的）导出目录。
+    JPEG 优先使用 libjpeg-turbo（SIMD 加速的 DCT/色彩转换），其余格式使用 cv2.imencode
+    """
+    if _turbo_jpeg is not None and image_ext.lower() in JPEG_EXTS:
+        # 裁剪出的子图是带行步长的视图，只有宽度等于原图时才是 C 连续的；
+        # TurboJPEG 需要连续缓冲区，仅在必要时复制（cv2.imencode 可直接处理带步长的视图）
+        if not img.flags["C_CONTIGUOUS"]:
+            img = np.ascontiguousarray(img)
+        buf = _turbo_jpeg.encode(img, quality=JPEG_QUALITY, jpeg_subsample=TJSAMP_420)
+    else:
+        ok, buf = cv2.imencode(image_ext, img)
+        if not ok:
+            print(f"  警告：无法编码子图 {image_path}")
+            return
+    write_new_file(image_path, buf)
+    if export_image_path is not None:
+        try:
+            write_new_file(export_image_path, buf)
+        except OSError as e:
+            print(f"  警告：导出文件到 {export_image_path.parent.parent} 失败: {e}")
+
+
+def _init_worker(encode_threads: int = 4):
+    global _encode_pool, _turbo_jpeg
+    # 每个子进程内限制OpenCV为单线程，避免与进程池叠加造成CPU超额订阅
+    cv2.setNumThreads(1)
+    # TurboJPEG 每次 encode 都会新建压缩句柄，同一实例可被多个编码线程共享
+    if TurboJPEG is not None:
+        try:
+            _turbo_jpeg = TurboJPEG()
+        except (OSError, RuntimeError):  # 找不到 libturbojpeg 动态库
+            _turbo_jpeg = None
+    # cv2.imwrite 在编码和写盘时会释放GIL，多个子图可在线程中并发编码
+    if encode_threads > 1:
+        _encode_pool = ThreadPoolExecutor(max_workers=encode_threads)
+
+
+def _split_worker(task: tuple) -> Tuple[int, int]:
+    return YOLOImageSplitter.split_image_and_labels(*task)
 
 
 class YOLOImageSplitter:
@@ -27,6 +156,7 @@ class YOLOImageSplitter:
         generate_center: bool = False,
         require_full_bbox: bool = False,
         export_dir: Optional[str] = None,
+        num_workers: Optional[int] = None,
     ):
         """
         初始化切分器
@@ -40,6 +170,7 @@ class YOLOImageSplitter:
             generate_center: 是否生成中心子图
             require_full_bbox: 是否要求检测框完全在子图内才保存子图
             export_dir: 如果指定则把新生成的子图和标注拷贝到该目录（会在目录下创建 images/ 和 labels/ 子目录）
+            num_workers: 并行切分的进程数，None表示使用CPU核数
         """
         self.root_dir = Path(root_dir)
         self.overlap_ratio = overlap_ratio
@@ -51,6 +182,7 @@ class YOLOImageSplitter:
         # 将生成的新子图（包括图片和对应的标注）拷贝到 export_dir
         # export_dir 为 None 表示不执行额外拷贝
         self.export_dir = Path(export_dir) if export_dir else None
+        self.num_workers = num_workers
 
         self.images_dir = self.root_dir / "images"
         self.labels_dir = self.root_dir / "labels"
@@ -130,22 +262,28 @@ class YOLOImageSplitter:
 
         return self.export_images_dir, self.export_labels_dir
 
+    @staticmethod
+    @lru_cache(maxsize=32)
     def calculate_split_regions(
-        self, img_width: int, img_height: int
-    ) -> List[Tuple[str, int, int, int, int]]:
+        img_width: int, img_height: int, overlap_ratio: float, generate_center: bool
+    ) -> Tuple[Tuple[str, int, int, int, int], ...]:
         """
         计算四个切分区域的坐标
 
+        结果按参数缓存：同一数据集的图片分辨率通常相同，重复计算可直接命中缓存
+
         Args:
             img_width: 图片宽度
             img_height: 图片高度
+            overlap_ratio: 重叠区域占全图的百分比
+            generate_center: 是否生成中心子图
 
         Returns:
-            List of (name, x1, y1, x2, y2) for each region
+            Tuple of (name, x1, y1, x2, y2) for each region
         """
         # 计算重叠像素数
-        overlap_w = int(img_width * self.overlap_ratio)
-        overlap_h = int(img_height * self.overlap_ratio)
+        overlap_w = int(img_width * overlap_ratio)
+        overlap_h = int(img_height * overlap_ratio)
 
         # 计算分割点（中心点向两边扩展重叠区域的一半）
         mid_x = img_width // 2
@@ -164,7 +302,7 @@ class YOLOImageSplitter:
         ]
 
         # 如果生成中心子图，添加中心区域
-        if self.generate_center:
+        if generate_center:
             # 子图的尺寸等于四个角的子图尺寸
             sub_width = right_split  # 左上、左下子图的宽度
             sub_height = bottom_split  # 左上、右上子图的高度
@@ -183,34 +321,29 @@ class YOLOImageSplitter:
             
             regions.append(("center", center_x1, center_y1, center_x2, center_y2))
 
-        return regions
+        # 返回不可变的元组，避免调用方修改缓存中的结果
+        return tuple(regions)
 
-    def convert_bbox_to_region(
-        self,
-        bbox: List[float],
-        img_width: int,
-        img_height: int,
-        region_x1: int,
-        region_y1: int,
-        region_x2: int,
-        region_y2: int,
-    ) -> Tuple[bool, Optional[List[float]], bool]:
+    @staticmethod
+    def bboxes_to_pixel_corners(
+        bboxes: np.ndarray, img_width: int, img_height: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
-        将YOLO格式的bbox转换到切分后的子图坐标系
+        将一组YOLO格式的bbox转换为原图像素坐标的边界和面积。
+        与切分区域无关，每张图片只需计算一次，供所有区域复用
 
         Args:
-            bbox: YOLO格式 [x_center, y_center, width, height] (归一化)
+            bboxes: 形状为 (N, 4) 的数组，每行为 [x_center, y_center, width, height] (归一化)
             img_width, img_height: 原图尺寸
-            region_x1, region_y1, region_x2, region_y2: 子图在原图中的区域
 
         Returns:
-            (is_valid, new_bbox, is_full): 是否有效，新的YOLO格式bbox，是否完整
+            (x1, y1, x2, y2, area): 各为形状 (N,) 的数组
         """
         # 转换为像素坐标
-        x_center = bbox[0] * img_width
-        y_center = bbox[1] * img_height
-        box_width = bbox[2] * img_width
-        box_height = bbox[3] * img_height
+        x_center = bboxes[:, 0] * img_width
+        y_center = bboxes[:, 1] * img_height
+        box_width = bboxes[:, 2] * img_width
+        box_height = bboxes[:, 3] * img_height
 
         # 计算bbox的边界
         x1 = x_center - box_width / 2
@@ -218,24 +351,49 @@ class YOLOImageSplitter:
         x2 = x_center + box_width / 2
         y2 = y_center + box_height / 2
 
+        return x1, y1, x2, y2, box_width * box_height
+
+    @staticmethod
+    def convert_bboxes_to_region(
+        corners: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+        region_x1: int,
+        region_y1: int,
+        region_x2: int,
+        region_y2: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        将一组bbox批量转换到切分后的子图坐标系（NumPy向量化）
+
+        Args:
+            corners: bboxes_to_pixel_corners 的返回值 (x1, y1, x2, y2, area)
+            region_x1, region_y1, region_x2, region_y2: 子图在原图中的区域
+
+        Returns:
+            (valid_mask, new_bboxes, full_mask): 每个bbox是否有效，
+            新的YOLO格式bbox (N, 4)（仅 valid_mask 为 True 的行有意义），是否完整
+        """
+        x1, y1, x2, y2, original_area = corners
+
         # 裁剪到子图区域
-        clipped_x1 = max(x1, region_x1)
-        clipped_y1 = max(y1, region_y1)
-        clipped_x2 = min(x2, region_x2)
-        clipped_y2 = min(y2, region_y2)
+        clipped_x1 = np.maximum(x1, region_x1)
+        clipped_y1 = np.maximum(y1, region_y1)
+        clipped_x2 = np.minimum(x2, region_x2)
+        clipped_y2 = np.minimum(y2, region_y2)
 
         # 检查是否有交集
-        if clipped_x1 >= clipped_x2 or clipped_y1 >= clipped_y2:
-            return False, None, False
+        intersects = (clipped_x1 < clipped_x2) & (clipped_y1 < clipped_y2)
 
         # 计算裁剪后的面积占原bbox的比例
-        original_area = box_width * box_height
         clipped_area = (clipped_x2 - clipped_x1) * (clipped_y2 - clipped_y1)
-        area_ratio = clipped_area / original_area if original_area > 0 else 0
+        area_ratio = np.divide(
+            clipped_area,
+            original_area,
+            out=np.zeros_like(clipped_area),
+            where=original_area > 0,
+        )
 
         # 如果裁剪后面积太小（小于原面积的10%），则丢弃
-        if area_ratio < 0.1:
-            return False, None, False
+        valid_mask = intersects & (area_ratio >= 0.1)
 
         # 转换到子图坐标系
         new_x1 = clipped_x1 - region_x1
@@ -247,64 +405,132 @@ class YOLOImageSplitter:
         region_width = region_x2 - region_x1
         region_height = region_y2 - region_y1
 
-        # 转换为YOLO格式（归一化）
-        new_x_center = (new_x1 + new_x2) / 2 / region_width
-        new_y_center = (new_y1 + new_y2) / 2 / region_height
-        new_width = (new_x2 - new_x1) / region_width
-        new_height = (new_y2 - new_y1) / region_height
+        # 转换为YOLO格式（归一化），并做边界检查
+        new_bboxes = np.stack(
+            [
+                (new_x1 + new_x2) / 2 / region_width,
+                (new_y1 + new_y2) / 2 / region_height,
+                (new_x2 - new_x1) / region_width,
+                (new_y2 - new_y1) / region_height,
+            ],
+            axis=1,
+        )
+        np.clip(new_bboxes, 0, 1, out=new_bboxes)
+
+        return valid_mask, new_bboxes, valid_mask & (area_ratio >= 1.0)
+
+    @staticmethod
+    def load_annotations(label_path: Optional[Path]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        读取YOLO标注文件
 
-        # 边界检查
-        new_x_center = max(0, min(1, new_x_center))
-        new_y_center = max(0, min(1, new_y_center))
-        new_width = max(0, min(1, new_width))
-        new_height = max(0, min(1, new_height))
+        Args:
+            label_path: 标注路径，None 表示该图片没有标注
 
-        return True, [new_x_center, new_y_center, new_width, new_height], area_ratio >= 1.0
+        Returns:
+            (class_ids, bboxes): 形状为 (N,) 的类别数组和 (N, 4) 的bbox数组，
+            标注不存在或为空时 N 为 0
+        """
+        empty = np.empty(0, dtype=np.int64), np.empty((0, 4), dtype=np.float64)
+        # 调用方已按 labels 目录的文件名集合筛选过，这里不再逐个 stat；
+        # 文件在此期间被删除或无法读取时按无标注处理
+        if label_path is None:
+            return empty
+
+        try:
+            # 由 NumPy 在C层一次性解析整个文件；空文件会产生 UserWarning，此处忽略
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                arr = np.loadtxt(
+                    label_path, dtype=np.float64, ndmin=2, usecols=range(5)
+                )
+            return arr[:, 0].astype(np.int64), arr[:, 1:5]
+        except OSError:
+            return empty
+        except ValueError:
+            pass
+
+        # 列数不一致（例如存在少于5列的行）时逐行解析，跳过不完整的行
+        # 以二进制整体读取并直接解析bytes，省去文本解码和逐行readline
+        try:
+            with open(label_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return empty
+        class_ids = []
+        bboxes = []
+        append_class_id = class_ids.append
+        append_bbox = bboxes.append
+        for line in data.splitlines():
+            parts = line.split()
+            if len(parts) >= 5:
+                append_class_id(int(parts[0]))
+                append_bbox(
+                    (float(parts[1]), float(parts[2]), float(parts[3]), float(parts[4]))
+                )
+        return (
+            np.array(class_ids, dtype=np.int64),
+            np.array(bboxes, dtype=np.float64).reshape(-1, 4),
+        )
 
+    @staticmethod
     def split_image_and_labels(
-        self,
         image_path: Path,
-        label_path: Path,
+        label_path: Optional[Path],
         out_images_dir: Path,
         out_labels_dir: Path,
-    ) -> int:
+        overlap_ratio: float,
+        generate_center: bool,
+        require_full_bbox: bool,
+        export_images_dir: Optional[Path] = None,
+        export_labels_dir: Optional[Path] = None,
+    ) -> Tuple[int, int]:
         """
         切分单个图片和对应的标注
 
+        参数均可被pickle，以便在进程池中并行执行，不修改任何实例状态
+
         Args:
             image_path: 图片路径
-            label_path: 标注路径
+            label_path: 标注路径，None 表示该图片没有标注
             out_images_dir: 输出图片目录
             out_labels_dir: 输出标注目录
+            overlap_ratio: 重叠区域占全图的百分比
+            generate_center: 是否生成中心子图
+            require_full_bbox: 是否要求检测框完全在子图内才保存子图
+            export_images_dir, export_labels_dir: 导出目录，None表示不导出
 
         Returns:
-            生成的子图数量
+            (生成的子图数量, 生成的标注数量)
         """
         # 读取图片
-        img = cv2.imread(str(image_path))
+        try:
+            img = read_image_mmap(image_path, cv2.IMREAD_COLOR)
+        except OSError:
+            img = None
         if img is None:
             print(f"  警告：无法读取图片 {image_path}")
-            return 0
+            return 0, 0
 
         img_height, img_width = img.shape[:2]
         image_name = image_path.stem
         image_ext = image_path.suffix
 
         # 读取标注
-        annotations = []
-        if label_path.exists():
-            with open(label_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) >= 5:
-                        class_id = int(parts[0])
-                        bbox = [float(x) for x in parts[1:5]]
-                        annotations.append((class_id, bbox))
+        class_ids, bboxes = YOLOImageSplitter.load_annotations(label_path)
+        # 像素坐标与面积只依赖原图，所有切分区域共用
+        corners = YOLOImageSplitter.bboxes_to_pixel_corners(bboxes, img_width, img_height)
 
         # 计算切分区域
-        regions = self.calculate_split_regions(img_width, img_height)
+        regions = YOLOImageSplitter.calculate_split_regions(
+            img_width, img_height, overlap_ratio, generate_center
+        )
 
+        export = bool(export_images_dir and export_labels_dir)
         split_count = 0
+        annotation_count = 0
+        # 已提交的子图编码任务
+        futures = []
         for region_name, x1, y1, x2, y2 in regions:
             # 切分图片
             cropped_img = img[y1:y2, x1:x2]
@@ -316,47 +542,51 @@ class YOLOImageSplitter:
             new_image_path = out_images_dir / new_image_name
             new_label_path = out_labels_dir / new_label_name
 
-            # 处理标注
-            new_annotations = []
-            has_full_bbox = False
-            for class_id, bbox in annotations:
-                is_valid, new_bbox, is_full = self.convert_bbox_to_region(
-                    bbox, img_width, img_height, x1, y1, x2, y2
-                )
-                if is_valid:
-                    new_annotations.append((class_id, new_bbox))
-                    if is_full:
-                        has_full_bbox = True
+            # 处理标注（对所有bbox一次性向量化计算）
+            valid_mask, new_bboxes, full_mask = YOLOImageSplitter.convert_bboxes_to_region(
+                corners, x1, y1, x2, y2
+            )
+            new_annotations = list(
+                zip(class_ids[valid_mask].tolist(), new_bboxes[valid_mask].tolist())
+            )
+            has_full_bbox = bool(full_mask.any())
 
             # 如果需要完整bbox但没有，则跳过保存
-            if self.require_full_bbox and not has_full_bbox:
+            if require_full_bbox and not has_full_bbox:
                 continue
 
-            # 保存图片
-            cv2.imwrite(str(new_image_path), cropped_img)
-
-            # 保存标注
-            with open(new_label_path, "w", encoding="utf-8") as f:
-                for class_id, bbox in new_annotations:
-                    line = f"{class_id} {bbox[0]:.6f} {bbox[1]:.6f} {bbox[2]:.6f} {bbox[3]:.6f}\n"
-                    f.write(line)
+            # 保存图片：只编码一次，同一份数据同时写入输出目录和导出目录（export/images）
+            # 有编码线程池时异步编码，主线程继续写标注和切分下一个子图
+            export_image_path = export_images_dir / new_image_name if export else None
+            if _encode_pool is not None:
+                futures.append(
+                    _encode_pool.submit(
+                        _encode_and_save, cropped_img, image_ext, new_image_path, export_image_path
+                    )
+                )
+            else:
+                _encode_and_save(cropped_img, image_ext, new_image_path, export_image_path)
+
+            # 保存标注：内容只生成一次，以二进制方式单次写入输出目录和导出目录（export/labels）
+            label_data = "".join(
+                f"{class_id} {bbox[0]:.6f} {bbox[1]:.6f} {bbox[2]:.6f} {bbox[3]:.6f}\n"
+                for class_id, bbox in new_annotations
+            ).encode("ascii")
+            write_new_file(new_label_path, label_data)
+            if export:
+                try:
+                    write_new_file(export_labels_dir / new_label_name, label_data)
+                except OSError as e:
+                    print(f"  警告：导出文件到 {export_labels_dir.parent} 失败: {e}")
 
             split_count += 1
-            self.total_new_annotations += len(new_annotations)
+            annotation_count += len(new_annotations)
 
-            # 如果指定了导出目录，将生成的子图和label分别拷贝到 export/images 和 export/labels 子目录
-            if self.export_dir and hasattr(self, 'export_images_dir') and hasattr(self, 'export_labels_dir'):
-                try:
-                    # 拷贝图片
-                    shutil.copy2(new_image_path, self.export_images_dir / new_image_path.name)
-                    # 拷贝标注
-                    if new_label_path.exists():
-                        shutil.copy2(new_label_path, self.export_labels_dir / new_label_path.name)
-                except Exception as e:
-                    print(f"  警告：导出文件到 {self.export_dir} 失败: {e}")
+        # 等待所有子图编码写入完成
+        for future in futures:
+            future.result()
 
-        self.total_new_images += split_count
-        return split_count
+        return split_count, annotation_count
 
     def process(self):
         """处理所有图片和标注"""
@@ -390,29 +620,29 @@ class YOLOImageSplitter:
             if self.output_dir:
                 for img_file in self.images_dir.iterdir():
                     if img_file.suffix.lower() in self.SUPPORTED_IMAGE_EXTS:
-                        shutil.copy2(img_file, out_images_dir / img_file.name)
+                        link_or_copy(img_file, out_images_dir / img_file.name)
 
                 for label_file in self.labels_dir.iterdir():
                     if label_file.suffix.lower() == ".txt":
-                        shutil.copy2(label_file, out_labels_dir / label_file.name)
+                        link_or_copy(label_file, out_labels_dir / label_file.name)
 
             if self.export_dir and export_dirs:
                 export_images_dir, export_labels_dir = export_dirs
                 for img_file in self.images_dir.iterdir():
                     if img_file.suffix.lower() in self.SUPPORTED_IMAGE_EXTS:
-                        shutil.copy2(img_file, export_images_dir / img_file.name)
+                        link_or_copy(img_file, export_images_dir / img_file.name)
                 for label_file in self.labels_dir.iterdir():
                     if label_file.suffix.lower() == ".txt":
-                        shutil.copy2(label_file, export_labels_dir / label_file.name)
+                        link_or_copy(label_file, export_labels_dir / label_file.name)
 
         # 收集所有图片
-        image_files = sorted(
-            [
-                f
-                for f in self.images_dir.iterdir()
-                if f.suffix.lower() in self.SUPPORTED_IMAGE_EXTS
-            ]
-        )
+        with os.scandir(self.images_dir) as it:
+            image_files = sorted(
+                Path(entry.path)
+                for entry in it
+                if entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in self.SUPPORTED_IMAGE_EXTS
+            )
 
         if not image_files:
             print(f"\n错误：在 {self.images_dir} 中没有找到图片文件")
@@ -422,30 +652,65 @@ class YOLOImageSplitter:
         print(f"\n找到 {self.total_images} 个图片文件")
         print("\n开始切分...")
 
-        # 处理每个图片
-        for idx, image_path in enumerate(image_files, 1):
-            print(f"[{idx}/{self.total_images}] {image_path.name}")
-
-            label_path = self.labels_dir / f"{image_path.stem}.txt"
-
-            split_count = self.split_image_and_labels(
-                image_path, label_path, out_images_dir, out_labels_dir
+        # 一次性列出已有的标注文件，避免对每张图片的标注路径单独 stat
+        with os.scandir(self.labels_dir) as it:
+            existing_labels = {
+                entry.name[:-4] for entry in it if entry.name.endswith(".txt")
+            }
+
+        export_images_dir, export_labels_dir = export_dirs or (None, None)
+        tasks = [
+            (
+                image_path,
+                self.labels_dir / f"{image_path.stem}.txt"
+                if image_path.stem in existing_labels
+                else None,
+                out_images_dir,
+                out_labels_dir,
+                self.overlap_ratio,
+                self.generate_center,
+                self.require_full_bbox,
+                export_images_dir,
+                export_labels_dir,
             )
+            for image_path in image_files
+        ]
 
-            if split_count > 0:
-                self.total_split += 1
-                print(f"  ✓ 生成 {split_count} 个子图")
-            else:
-                print("  ✗ 切分失败")
+        # 先为窗口内的图片发起异步预读，之后每完成一张再预读窗口末尾的下一张
+        for image_path in image_files[:PREFETCH_WINDOW]:
+            prefetch_file(image_path)
+
+        # 每张图片的读取、切分、编码和写入相互独立，使用进程池并行处理
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers or os.cpu_count(), initializer=_init_worker
+        ) as executor:
+            results = executor.map(_split_worker, tasks, chunksize=8)
+            progress = tqdm(
+                zip(image_files, results),
+                total=self.total_images,
+                desc="切分图片",
+                unit="img",
+                mininterval=0.5,
+            )
+            for idx, (image_path, (split_count, annotation_count)) in enumerate(progress, 1):
+                next_idx = idx - 1 + PREFETCH_WINDOW
+                if next_idx < self.total_images:
+                    prefetch_file(image_files[next_idx])
+
+                self.total_new_images += split_count
+                self.total_new_annotations += annotation_count
+                if split_count > 0:
+                    self.total_split += 1
+                else:
+                    tqdm.write(f"  ✗ 切分失败: {image_path.name}")
 
         # 如果不保留原图且在覆盖模式，删除原图
         if not self.keep_original and not self.output_dir:
             print("\n删除原始图片和标注...")
             for img_file in image_files:
                 img_file.unlink()
-                label_file = self.labels_dir / f"{img_file.stem}.txt"
-                if label_file.exists():
-                    label_file.unlink()
+                if img_file.stem in existing_labels:
+                    (self.labels_dir / f"{img_file.stem}.txt").unlink(missing_ok=True)
 
         # 打印总结
         print("\n" + "=" * 70)
@@ -547,6 +812,14 @@ def main():
         help="只保存包含完整检测框的子图（检测框完全在子图内）",
     )
 
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="并行切分的进程数（默认CPU核数）",
+    )
+
     args = parser.parse_args()
 
     # 创建切分器
@@ -559,6 +832,7 @@ def main():
         generate_center=args.generate_center,
         require_full_bbox=args.require_full_bbox,
         export_dir=args.export,
+        num_workers=args.workers,
     )
 
     # 执行切分
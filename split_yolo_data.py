@@ -13,6 +13,9 @@ Usage:
         --clean           若目标输出目录存在，清空 `train/` 和 `val/` 子目录后再复制
         --force           在 --clean 模式下跳过交互确认并强制清理
         --seed            随机种子
+        --workers         并行复制的线程数 (默认: min(32, CPU核数*4))
+        --link-mode       文件写入方式: copy(复制) / hardlink(硬链接) / reflink(写时复制克隆)，
+                          链接失败(如跨文件系统)时自动回退为复制 (默认: copy)
 
 Examples:
     python split_yolo_data.py --root_dir /data/yolo_dataset
@@ -22,8 +25,15 @@ Examples:
 
 import os
 import shutil
-import random
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from file_copy import clone_file, copy_file, link_or_copy
+
+
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp'})
 
 
 def validate_directory_structure(root_dir):
@@ -48,32 +58,48 @@ def get_matched_files(root_dir):
     images_dir = os.path.join(root_dir, 'images')
     labels_dir = os.path.join(root_dir, 'labels')
     image_files = []
-    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp'}
-
-    for filename in os.listdir(images_dir):
-        file_path = os.path.join(images_dir, filename)
-        if os.path.isfile(file_path):
-            # 检查文件扩展名
-            ext = os.path.splitext(filename)[1].lower()
-            if ext not in image_extensions:
+    image_extensions = IMAGE_EXTENSIONS
+
+    # 一次性读取 labels 目录中的标注文件名，后续用集合查找代替逐个 isfile
+    with os.scandir(labels_dir) as it:
+        label_stems = {entry.name[:-4] for entry in it
+                       if entry.name.endswith('.txt') and entry.is_file()}
+
+    # scandir 的 DirEntry 自带文件类型信息，is_file() 通常无需额外 stat
+    with os.scandir(images_dir) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            filename = entry.name
+            # 检查文件扩展名并提取基础文件名（只拆分一次）
+            base_name, ext = os.path.splitext(filename)
+            if ext.lower() not in image_extensions:
                 continue
-            # 提取基础文件名
-            base_name = os.path.splitext(filename)[0]
             # 检查标注文件是否存在
-            label_filename = f"{base_name}.txt"
-            label_path = os.path.join(labels_dir, label_filename)
-            if os.path.isfile(label_path):
+            if base_name in label_stems:
                 image_files.append((filename, base_name))
             else:
                 print(f"警告：跳过无标注的图片 {filename}")
     return image_files
 
 
-def split_files(file_list, train_ratio):
+def split_files(file_list, train_ratio, seed=None):
     """随机分割文件列表为训练集和验证集"""
-    random.shuffle(file_list)
-    split_idx = int(len(file_list) * train_ratio)
-    return file_list[:split_idx], file_list[split_idx:]
+    # 在 C 层打乱整数下标，再按下标取文件，而不是在 Python 层逐个交换列表元素
+    n = len(file_list)
+    split_idx = int(n * train_ratio)
+    idx = np.random.default_rng(seed).permutation(n).tolist()
+    train_files = [file_list[i] for i in idx[:split_idx]]
+    val_files = [file_list[i] for i in idx[split_idx:]]
+    return train_files, val_files
+
+
+# --link-mode 到文件写入函数的映射
+LINK_FUNCS = {
+    'copy': copy_file,
+    'hardlink': link_or_copy,
+    'reflink': clone_file,
+}
 
 
 def create_dirs(target_dir):
@@ -83,25 +109,32 @@ def create_dirs(target_dir):
         os.makedirs(os.path.join(target_dir, d), exist_ok=True)
 
 
-def copy_dataset_files(root_dir, target_dir, files, mode):
-    """复制文件到目标目录"""
+def copy_dataset_files(root_dir, target_dir, files, mode, max_workers=None,
+                       link_mode='copy'):
+    """复制文件到目标目录（图片与标签逐文件提交到线程池并行复制）"""
+    copy_func = LINK_FUNCS[link_mode]
     src_img_dir = os.path.join(root_dir, 'images')
     src_lbl_dir = os.path.join(root_dir, 'labels')
     dst_img_dir = os.path.join(target_dir, mode, 'images')
     dst_lbl_dir = os.path.join(target_dir, mode, 'labels')
 
-    for img_filename, base_name in files:
-        # 复制图片
-        shutil.copy2(
-            os.path.join(src_img_dir, img_filename),
-            os.path.join(dst_img_dir, img_filename)
-        )
-        # 复制标签
-        lbl_filename = f"{base_name}.txt"
-        shutil.copy2(
-            os.path.join(src_lbl_dir, lbl_filename),
-            os.path.join(dst_lbl_dir, lbl_filename)
-        )
+    def iter_copy_jobs():
+        for img_filename, base_name in files:
+            # 图片
+            yield (os.path.join(src_img_dir, img_filename),
+                   os.path.join(dst_img_dir, img_filename))
+            # 标签
+            lbl_filename = f"{base_name}.txt"
+            yield (os.path.join(src_lbl_dir, lbl_filename),
+                   os.path.join(dst_lbl_dir, lbl_filename))
+
+    # 复制耗时主要在文件系统调用上（会释放GIL），用线程池隐藏单次I/O延迟
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 消费 map 的结果，使任一复制失败时异常能够抛出
+        for _ in executor.map(lambda job: copy_func(*job), iter_copy_jobs()):
+            pass
 
 
 def main():
@@ -124,11 +157,12 @@ def main():
     parser.add_argument('--force', action='store_true',
                         help='在 --clean 模式下跳过交互确认并强制清理')
     parser.add_argument('--seed', type=int, default=53, help='随机种子')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='并行复制的线程数 (默认 min(32, CPU核数*4))')
+    parser.add_argument('--link-mode', choices=sorted(LINK_FUNCS), default='copy',
+                        help='文件写入方式: copy / hardlink / reflink，链接失败时回退为复制 (默认 copy)')
     args = parser.parse_args()
 
-    # 初始化随机种子
-    random.seed(args.seed)
-
     # 将 root_dir 转为绝对路径，方便后续操作
     args.root_dir = os.path.abspath(args.root_dir)
     # 计算输出目录：当用户未指定 --output_dir 时使用 root_dir/out_subdir
@@ -146,7 +180,8 @@ def main():
             raise ValueError("未找到有效的图片-标注文件对")
 
         # 分割数据集
-        train_files, val_files = split_files(matched_files, args.train_ratio)
+        train_files, val_files = split_files(matched_files, args.train_ratio,
+                                             args.seed)
         print(f"找到 {len(matched_files)} 对有效文件")
         print(f"训练集: {len(train_files)} 验证集: {len(val_files)}")
 
@@ -172,8 +207,9 @@ def main():
 
         # 复制文件
         copy_dataset_files(args.root_dir, args.output_dir,
-                           train_files, 'train')
-        copy_dataset_files(args.root_dir, args.output_dir, val_files, 'val')
+                           train_files, 'train', args.workers, args.link_mode)
+        copy_dataset_files(args.root_dir, args.output_dir,
+                           val_files, 'val', args.workers, args.link_mode)
 
         print(f"\n数据集已成功划分到: {os.path.abspath(args.output_dir)}")
 
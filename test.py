@@ -1,43 +1,21 @@
 import os
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import DataLoader
 from torchvision import transforms
 from efficientnet_pytorch import EfficientNet
-from PIL import Image
-
-
-class CustomDataset(Dataset):
-    def __init__(self, root_dir, transform=None):
-        self.root_dir = root_dir
-        self.transform = transform
-        self.image_paths = []
-        self.labels = []
-        self.classes = os.listdir(root_dir)
-        self.class_to_idx = {cls_name: i for i,
-                             cls_name in enumerate(self.classes)}
-        for cls_name in self.classes:
-            cls_dir = os.path.join(root_dir, cls_name)
-            for img_name in os.listdir(cls_dir):
-                self.image_paths.append(os.path.join(cls_dir, img_name))
-                self.labels.append(self.class_to_idx[cls_name])
-
-    def __len__(self):
-        return len(self.image_paths)
-
-    def __getitem__(self, idx):
-        img_path = self.image_paths[idx]
-        image = Image.open(img_path).convert('RGB')
-        label = self.labels[idx]
-        if self.transform:
-            image = self.transform(image)
-        return image, label
+from classify_dataset import (CustomDataset, collate_raw_bytes,
+                              decode_batch_on_gpu)
 
 
 def test(root_dir,
          pretrained_model="efficientnet-b4",
          model_path="efficientnet_110.pth",
-         batch_size=1,
-         num_workers=1):
+         batch_size=64,
+         num_workers=None,
+         use_amp=True,
+         gpu_decode=False,
+         compile_model=False,
+         use_memmap=False):
     data_transforms = {
         'test': transforms.Compose([
             transforms.Resize((224, 224)),
@@ -45,15 +23,44 @@ def test(root_dir,
             transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
         ]),
     }
+    # gpu_decode 模式下在 GPU 上执行的变换（ToTensor 由 decode_batch_on_gpu 完成）
+    gpu_resize = transforms.Resize((224, 224), antialias=True)
+    gpu_normalize = transforms.Normalize([0.485, 0.456, 0.406],
+                                         [0.229, 0.224, 0.225])
+    # use_memmap 模式下图片已预先缩放为 224x224 的 uint8 CHW 张量
+    memmap_transform = transforms.Compose([
+        transforms.ConvertImageDtype(torch.float),
+        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+    ])
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    # GPU 解码仅支持 JPEG 且需要 CUDA；开启后 DataLoader 工作进程只负责读取文件字节
+    # （use_memmap 时图片已预先解码，不再需要）
+    gpu_decode = gpu_decode and device.type == "cuda" and not use_memmap
+    if use_memmap:
+        test_transform = memmap_transform
+    elif gpu_decode:
+        test_transform = None
+    else:
+        test_transform = data_transforms['test']
 
     test_dataset = CustomDataset(
         root_dir=os.path.join(root_dir, "test"),
-        transform=data_transforms['test'])
-
+        transform=test_transform,
+        raw_bytes=gpu_decode,
+        memmap=use_memmap)
+
+    if num_workers is None:
+        num_workers = min(8, os.cpu_count() or 1)
+    # 锁页内存使主机到GPU的拷贝可以异步进行
+    loader_kwargs = dict(num_workers=num_workers,
+                         pin_memory=device.type == "cuda")
+    if num_workers > 0:
+        loader_kwargs.update(prefetch_factor=4)
+    if gpu_decode:
+        loader_kwargs.update(collate_fn=collate_raw_bytes)
     test_loader = DataLoader(test_dataset, batch_size=batch_size,
-                             shuffle=False, num_workers=num_workers)
-
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+                             shuffle=False, **loader_kwargs)
 
     num_classes = len(test_dataset.classes)
 
@@ -61,27 +68,48 @@ def test(root_dir,
                                          num_classes=num_classes)
     model.load_state_dict(torch.load(model_path))
 
-    model = model.to(device)
+    # NHWC（channels_last）布局下 cuDNN 可为深度可分离卷积选用 Tensor Core 内核，输入需保持相同布局
+    model = model.to(device, memory_format=torch.channels_last)
+    # 输入尺寸固定为 224x224，让 cuDNN 为每层自动选择最快的卷积算法
+    torch.backends.cudnn.benchmark = True
+    # torch.compile 的编译开销只在测试集较大时才划算，默认关闭；
+    # 编译后的模块 state_dict 带有 _orig_mod. 前缀，保存时使用原始模块
+    raw_model = model
+    # 仅在 GPU 上启用：CPU 上编译依赖 inductor 的 C++ 工具链
+    if compile_model and device.type == "cuda" and hasattr(torch, "compile"):
+        model = torch.compile(model, mode="reduce-overhead")
+
+    # 推理时在 GPU 上以 float16 自动混合精度运行（CPU 上不启用）
+    use_amp = use_amp and device.type == "cuda"
 
     # 验证阶段
     model.eval()
-    running_corrects = 0
-    with torch.no_grad():
+    # 正确数在 GPU 上累加，结束时只同步一次
+    running_corrects = torch.zeros((), dtype=torch.long, device=device)
+    # inference_mode 比 no_grad 更进一步，不记录版本计数与视图追踪
+    with torch.inference_mode():
         for inputs, labels in test_loader:
-            inputs = inputs.to(device)
-            labels = labels.to(device)
-
-            outputs = model(inputs)
+            if gpu_decode:
+                inputs = decode_batch_on_gpu(inputs, device, gpu_resize,
+                                             gpu_normalize)
+            else:
+                inputs = inputs.to(device, non_blocking=True,
+                                   memory_format=torch.channels_last)
+            labels = labels.to(device, non_blocking=True)
+
+            with torch.autocast(device_type=device.type, dtype=torch.float16,
+                                enabled=use_amp):
+                outputs = model(inputs)
             prob = torch.softmax(outputs, dim=1)
             _, preds = torch.max(prob, 1)
-            running_corrects += torch.sum(preds == labels.data)
+            running_corrects += (preds == labels).sum()
 
-    epoch_acc = running_corrects.double() / len(test_loader.dataset)
+    epoch_acc = running_corrects.item() / len(test_loader.dataset)
     print(
         f'Accuracy: {epoch_acc:.4f}')
 
     # 保存模型
-    torch.save(model.state_dict(), 'efficientnet_110.pth')
+    torch.save(raw_model.state_dict(), 'efficientnet_110.pth')
 
 
 if __name__ == '__main__':
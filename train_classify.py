@@ -2,37 +2,11 @@ import os
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import DataLoader
 from torchvision import transforms
 from efficientnet_pytorch import EfficientNet
-from PIL import Image
-
-
-class CustomDataset(Dataset):
-    def __init__(self, root_dir, transform=None):
-        self.root_dir = root_dir
-        self.transform = transform
-        self.image_paths = []
-        self.labels = []
-        self.classes = os.listdir(root_dir)
-        self.class_to_idx = {cls_name: i for i,
-                             cls_name in enumerate(self.classes)}
-        for cls_name in self.classes:
-            cls_dir = os.path.join(root_dir, cls_name)
-            for img_name in os.listdir(cls_dir):
-                self.image_paths.append(os.path.join(cls_dir, img_name))
-                self.labels.append(self.class_to_idx[cls_name])
-
-    def __len__(self):
-        return len(self.image_paths)
-
-    def __getitem__(self, idx):
-        img_path = self.image_paths[idx]
-        image = Image.open(img_path).convert('RGB')
-        label = self.labels[idx]
-        if self.transform:
-            image = self.transform(image)
-        return image, label
+from classify_dataset import (CustomDataset, collate_raw_bytes,
+                              decode_batch_on_gpu)
 
 
 def train(root_dir,
@@ -40,7 +14,11 @@ def train(root_dir,
           num_epochs=100,
           batch_size=32,
           num_workers=4,
-          learning_rate=0.0001):
+          learning_rate=0.0001,
+          use_amp=True,
+          gpu_decode=False,
+          compile_model=True,
+          use_memmap=False):
     data_transforms = {
         'train': transforms.Compose([
             transforms.Resize((224, 224)),
@@ -53,68 +31,144 @@ def train(root_dir,
             transforms.ToTensor(),
         ]),
     }
+    # gpu_decode 模式下在 GPU 上对解码后的 uint8 张量逐张执行的变换（ToTensor 由 decode_batch_on_gpu 完成）
+    gpu_transforms = {
+        'train': transforms.Compose([
+            transforms.Resize((224, 224), antialias=True),
+            transforms.RandomHorizontalFlip(),
+            transforms.RandomRotation(10),
+        ]),
+        'val': transforms.Resize((224, 224), antialias=True),
+    }
+    # use_memmap 模式下图片已预先缩放为 224x224 的 uint8 CHW 张量
+    memmap_transforms = {
+        'train': transforms.Compose([
+            transforms.RandomHorizontalFlip(),
+            transforms.RandomRotation(10),
+            transforms.ConvertImageDtype(torch.float),
+        ]),
+        'val': transforms.ConvertImageDtype(torch.float),
+    }
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    # GPU 解码仅支持 JPEG 且需要 CUDA；开启后 DataLoader 工作进程只负责读取文件字节
+    # （use_memmap 时图片已预先解码，不再需要）
+    gpu_decode = gpu_decode and device.type == "cuda" and not use_memmap
+    if use_memmap:
+        dataset_transforms = memmap_transforms
+    elif gpu_decode:
+        dataset_transforms = {'train': None, 'val': None}
+    else:
+        dataset_transforms = data_transforms
+    # torch.compile 仅在 GPU 上启用：CPU 上编译依赖 inductor 的 C++ 工具链
+    compiled = compile_model and device.type == "cuda" and hasattr(torch, "compile")
 
     train_dataset = CustomDataset(
         root_dir=os.path.join(root_dir, "train"),
-        transform=data_transforms['train'])
+        transform=dataset_transforms['train'],
+        raw_bytes=gpu_decode,
+        memmap=use_memmap)
     val_dataset = CustomDataset(
         root_dir=os.path.join(root_dir, "val"),
-        transform=data_transforms['val'])
-
+        transform=dataset_transforms['val'],
+        raw_bytes=gpu_decode,
+        memmap=use_memmap)
+
+    # 锁页内存使主机到GPU的拷贝可以异步进行；常驻工作进程避免每个epoch重新创建
+    loader_kwargs = dict(num_workers=num_workers,
+                         pin_memory=device.type == "cuda")
+    if num_workers > 0:
+        loader_kwargs.update(persistent_workers=True, prefetch_factor=4)
+    if gpu_decode:
+        loader_kwargs.update(collate_fn=collate_raw_bytes)
+    # 编译模型时丢弃不完整的最后一批，保证每步输入形状固定（torch.compile 的 CUDA Graph
+    # 无需为其重新录制）；未编译或训练集不足一批时保留
     train_loader = DataLoader(train_dataset, batch_size=batch_size,
-                              shuffle=True, num_workers=num_workers)
+                              shuffle=True,
+                              drop_last=compiled and len(train_dataset) >= batch_size,
+                              **loader_kwargs)
     val_loader = DataLoader(val_dataset, batch_size=32,
-                            shuffle=False, num_workers=num_workers)
-
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+                            shuffle=False, **loader_kwargs)
 
     num_classes = len(train_dataset.classes)
 
     model = EfficientNet.from_pretrained(pretrained_model)
     in_features = model._fc.in_features
     model._fc = nn.Linear(in_features, num_classes)
-    model = model.to(device)
+    # NHWC（channels_last）布局下 cuDNN 可为深度可分离卷积选用 Tensor Core 内核，输入需保持相同布局
+    model = model.to(device, memory_format=torch.channels_last)
+    # 输入尺寸固定为 224x224，让 cuDNN 为每层自动选择最快的卷积算法
+    torch.backends.cudnn.benchmark = True
+    # torch.compile（PyTorch 2.x）将前向/反向图编译为融合内核；
+    # 编译后的模块 state_dict 带有 _orig_mod. 前缀，保存时使用原始模块
+    raw_model = model
+    if compiled:
+        model = torch.compile(model, mode="reduce-overhead")
 
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), lr=learning_rate)
 
+    # 混合精度：前向/反向在 float16 下运行以利用 Tensor Core，GradScaler 缩放损失防止梯度下溢
+    # （仅在 GPU 上启用，CPU 上两者都退化为空操作）
+    use_amp = use_amp and device.type == "cuda"
+    scaler = torch.amp.GradScaler("cuda", enabled=use_amp)
+
     for epoch in range(num_epochs):
         # 训练阶段
         model.train()
-        running_loss = 0.0
+        # 损失与正确数在 GPU 上累加，每个 epoch 结束时才同步一次（.item()），避免每步阻塞流水线
+        running_loss = torch.zeros((), dtype=torch.float64, device=device)
+        num_samples = 0
         for inputs, labels in train_loader:
-            inputs = inputs.to(device)
-            labels = labels.to(device)
+            if gpu_decode:
+                inputs = decode_batch_on_gpu(inputs, device,
+                                             gpu_transforms['train'])
+            else:
+                inputs = inputs.to(device, non_blocking=True,
+                                   memory_format=torch.channels_last)
+            labels = labels.to(device, non_blocking=True)
 
             optimizer.zero_grad()
-            outputs = model(inputs)
-            loss = criterion(outputs, labels)
-            loss.backward()
-            optimizer.step()
+            with torch.autocast(device_type=device.type, dtype=torch.float16,
+                                enabled=use_amp):
+                outputs = model(inputs)
+                loss = criterion(outputs, labels)
+            scaler.scale(loss).backward()
+            scaler.step(optimizer)
+            scaler.update()
 
-            running_loss += loss.item() * inputs.size(0)
+            running_loss += loss.detach() * inputs.size(0)
+            num_samples += inputs.size(0)
 
-        epoch_loss = running_loss / len(train_loader.dataset)
+        # drop_last 时最后不完整的一批不参与训练，按实际训练的样本数求平均
+        epoch_loss = running_loss.item() / num_samples
         print(f'Epoch {epoch+1}/{num_epochs}, Training Loss: {epoch_loss:.4f}')
 
         # 验证阶段
         model.eval()
-        running_corrects = 0
+        running_corrects = torch.zeros((), dtype=torch.long, device=device)
         with torch.no_grad():
             for inputs, labels in val_loader:
-                inputs = inputs.to(device)
-                labels = labels.to(device)
-
-                outputs = model(inputs)
+                if gpu_decode:
+                    inputs = decode_batch_on_gpu(inputs, device,
+                                                 gpu_transforms['val'])
+                else:
+                    inputs = inputs.to(device, non_blocking=True,
+                                       memory_format=torch.channels_last)
+                labels = labels.to(device, non_blocking=True)
+
+                with torch.autocast(device_type=device.type, dtype=torch.float16,
+                                    enabled=use_amp):
+                    outputs = model(inputs)
                 _, preds = torch.max(outputs, 1)
-                running_corrects += torch.sum(preds == labels.data)
+                running_corrects += (preds == labels).sum()
 
-        epoch_acc = running_corrects.double() / len(val_loader.dataset)
+        epoch_acc = running_corrects.item() / len(val_loader.dataset)
         print(
             f'Epoch {epoch+1}/{num_epochs}, Validation Accuracy: {epoch_acc:.4f}')
 
     # 保存模型
-    torch.save(model.state_dict(), 'efficientnet_110.pth')
+    torch.save(raw_model.state_dict(), 'efficientnet_110.pth')
 
 
 if __name__ == '__main__':
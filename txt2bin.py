@@ -1,3 +1,5 @@
+import warnings
+
 import numpy as np
 
 def txt_to_bin(txt_path, bin_path, dtype=np.float32):
@@ -9,23 +11,29 @@ def txt_to_bin(txt_path, bin_path, dtype=np.float32):
         bin_path (str): 输出bin文件路径
         dtype (np.dtype): 数据类型，默认为np.float32
     """
-    # 读取txt文件，逐行解析为列表
-    with open(txt_path, 'r') as f:
-        lines = f.readlines()
-    
-    # 去除空行和换行符，转换为目标数据类型
-    data = []
-    for line in lines:
-        line = line.strip()  # 去除首尾空格/换行
-        if line:  # 跳过空行
-            try:
-                value = dtype(line)  # 转换为指定类型（如float32）
-                data.append(value)
-            except ValueError as e:
-                raise ValueError(f"无法将行 '{line}' 转换为 {dtype}: {e}")
-    
-    # 转为NumPy数组并保存为bin文件
-    np.array(data, dtype=dtype).tofile(bin_path)
+    # 由 NumPy 在C层一次性解析整个文件（自动跳过空行），不再逐行构造Python对象
+    try:
+        with warnings.catch_warnings():
+            # 空文件时 loadtxt 会发出警告，结果为空数组，与逐行解析一致
+            warnings.simplefilter("ignore", UserWarning)
+            data = np.loadtxt(txt_path, dtype=dtype, comments=None, ndmin=2)
+    except ValueError:
+        data = None
+    # ndmin=2 时每行一列，形状为 (行数, 1)；某行包含多个数据时列数不为 1
+    if data is None or data.shape[1] != 1:
+        # 解析失败或某行包含多个数据时，逐行定位出错的行以给出明确的错误信息
+        with open(txt_path, 'r') as f:
+            for line in f:
+                line = line.strip()  # 去除首尾空格/换行
+                if line:  # 跳过空行
+                    try:
+                        dtype(line)  # 转换为指定类型（如float32）
+                    except ValueError as e:
+                        raise ValueError(f"无法将行 '{line}' 转换为 {dtype}: {e}")
+        raise ValueError(f"无法将文件 {txt_path} 转换为 {dtype}")
+
+    # 保存为bin文件
+    data.ravel().tofile(bin_path)
     print(f"转换完成: {txt_path} -> {bin_path} (数据类型: {dtype})")
 
 # 示例用法